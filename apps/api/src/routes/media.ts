@@ -47,9 +47,15 @@ type MediaRecord = {
   derived?: {
     frames?: {
       geojson: string;
+      tracks?: string;
       baseDir: string;
     };
   };
+  framesResumo?: {
+    quantidade: number;
+    distancia_m: number;
+    trilhas?: Array<Record<string, unknown>>;
+  };
 };
 
 type FileMetaEntry = {
@@ -472,6 +478,21 @@ mediaRoutes.get("/:id/frames", (c) => {
   }
 });
 
+mediaRoutes.get("/:id/tracks", (c) => {
+  const id = c.req.param("id");
+  const tracksFile = join(MEDIA_FRAMES, id, "tracks.geojson");
+  if (!existsSync(tracksFile)) {
+    return c.json({ error: "Trilhas ainda não disponíveis." }, 404);
+  }
+  try {
+    const raw = readFileSync(tracksFile, "utf8");
+    const data = JSON.parse(raw) as FeatureCollection;
+    return c.json(data);
+  } catch (error) {
+    return c.json({ error: "Trilhas inválidas ou corrompidas." }, 500);
+  }
+});
+
 mediaRoutes.get("/search", (c) => {
   const { tema, periodoInicio, periodoFim, lineId, missionId } = c.req.query();
   const temaFiltro = temaFromValue(tema);
@@ -1,7 +1,7 @@
 import { Hono } from "hono";
 import { promises as fs } from "node:fs";
 import { mkdirSync, existsSync } from "node:fs";
-import { join, extname } from "node:path";
+import { basename, join, extname } from "node:path";
 import { v4 as uuidv4 } from "uuid";
 import type { Feature, FeatureCollection, LineString } from "geojson";
 
@@ -18,6 +18,8 @@ type IndexJob = {
   id: string;
   type: "index";
   inputFile: string;
+  // Relê todos os arquivos; o worker só detecta mudanças por tamanho + mtime.
+  force?: boolean;
   createdAt: string;
 };
 
@@ -112,8 +114,62 @@ pointcloudRoutes.post("/upload", async (c) => {
   return c.json({ id, lineId: formData.lineId ?? null });
 });
 
+pointcloudRoutes.post("/:id/sources", async (c) => {
+  const id = c.req.param("id");
+  const dir = join(BASE_DIR, id);
+  if (!existsSync(join(dir, "meta.json"))) {
+    return c.json({ error: "Pointcloud não encontrado." }, 404);
+  }
+
+  const formData = await c.req.parseBody();
+  const fileEntry = formData["file"];
+  if (!(fileEntry instanceof File)) {
+    return c.json({ error: "Arquivo .las ou .laz obrigatório" }, 400);
+  }
+
+  const originalName = fileEntry.name || "strip.las";
+  const ext = extname(originalName).toLowerCase();
+  if (![".las", ".laz"].includes(ext)) {
+    return c.json({ error: "Formato inválido. Envie arquivos .las ou .laz." }, 400);
+  }
+
+  const buffer = Buffer.from(await fileEntry.arrayBuffer());
+  if (buffer.length === 0) {
+    return c.json({ error: "Arquivo vazio." }, 400);
+  }
+
+  // Mesmo nome substitui a faixa anterior (reclassificação), inclusive trocando .las por .laz;
+  // o worker reindexa só o que mudou.
+  const baseName = basename(originalName, extname(originalName)).replace(/[^\w.-]+/g, "_") || "strip";
+  const sourcesDir = join(ensurePointcloudDir(id), "sources");
+  mkdirSync(sourcesDir, { recursive: true });
+  const target = join(sourcesDir, `${baseName}${ext}`);
+  // Nome temporário fora de .las/.laz para o worker não ler a faixa pela metade.
+  const tmpPath = join(sourcesDir, `.${baseName}${ext}.${uuidv4()}.tmp`);
+  await saveBufferToFile(tmpPath, buffer);
+  await Promise.all(
+    [".las", ".laz"]
+      .filter((siblingExt) => siblingExt !== ext)
+      .map((siblingExt) => fs.rm(join(sourcesDir, `${baseName}${siblingExt}`), { force: true }))
+  );
+  await fs.rename(tmpPath, target);
+
+  const fileLas = [".las", ".laz"]
+    .map((rawExt) => join(dir, `raw${rawExt}`))
+    .find((file) => existsSync(file));
+  const job: IndexJob = {
+    id,
+    type: "index",
+    inputFile: fileLas ?? target,
+    createdAt: new Date().toISOString()
+  };
+  await writeJobFile(id, job);
+
+  return c.json({ id, source: `sources/${baseName}${ext}`, status: "queued" });
+});
+
 pointcloudRoutes.post("/index", async (c) => {
-  const body = (await c.req.json().catch(() => null)) as { id?: string } | null;
+  const body = (await c.req.json().catch(() => null)) as { id?: string; force?: boolean } | null;
   if (!body?.id) {
     return c.json({ error: "Informe o id do pointcloud." }, 400);
   }
@@ -129,6 +185,7 @@ pointcloudRoutes.post("/index", async (c) => {
     id: body.id,
     type: "index",
     inputFile: fileLas,
+    ...(body.force === true ? { force: true } : {}),
     createdAt: new Date().toISOString()
   };
   await writeJobFile(body.id, job);
@@ -8,7 +8,8 @@ import { cn } from "@/lib/utils";
 import {
   getMediaFileUrl,
   getMediaFramesArchiveUrl,
-  getMediaFramesGeoJsonUrl
+  getMediaFramesGeoJsonUrl,
+  getMediaTracksGeoJsonUrl
 } from "@/services/media";
 
 type FrameFeature = Feature<
@@ -139,6 +140,11 @@ export const FramesPreview = ({
               <Download className="w-4 h-4 mr-2" /> Baixar GeoJSON
             </a>
           </Button>
+          <Button asChild variant="outline" size="sm">
+            <a href={getMediaTracksGeoJsonUrl(mediaId)} download>
+              <Download className="w-4 h-4 mr-2" /> Baixar trilhas
+            </a>
+          </Button>
           <Button asChild size="sm">
             <a href={getMediaFramesArchiveUrl(mediaId)} download>
               <Download className="w-4 h-4 mr-2" /> Baixar ZIP dos frames
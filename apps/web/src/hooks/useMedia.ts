@@ -1,5 +1,5 @@
 import { useMutation, useQuery, useQueryClient } from "@tanstack/react-query";
-import { fetchMediaFrames, fetchMediaRecord, searchMedia, uploadMedia } from "@/services/media";
+import { fetchMediaFrames, fetchMediaRecord, fetchMediaTracks, searchMedia, uploadMedia } from "@/services/media";
 import {
   listMediaJobs,
   getMediaJob,
@@ -35,6 +35,18 @@ export const useMediaFrames = (id?: string) =>
     retry: 3
   });
 
+export const useMediaTracks = (id?: string, options: { enabled?: boolean } = {}) =>
+  useQuery({
+    queryKey: ["media_tracks", id],
+    queryFn: () => {
+      if (!id) throw new Error("id requerido");
+      return fetchMediaTracks(id);
+    },
+    enabled: Boolean(id) && (options.enabled ?? true),
+    staleTime: 30_000,
+    retry: 3
+  });
+
 export const useMediaSearch = (params: {
   tema?: string;
   periodoInicio?: string;
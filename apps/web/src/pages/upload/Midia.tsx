@@ -1,9 +1,10 @@
-import { useEffect, useState } from 'react'
+import { useEffect, useMemo, useState } from 'react'
 import type { FeatureCollection } from 'geojson'
 import { MediaUploader } from '../../components/upload/MediaUploader'
 import { MapLibreUnified } from '../../components/MapLibreUnified'
 import { FramesPreview } from '@/components/upload/FramesPreview'
 import { useSelectionContext } from '@/context/SelectionContext'
+import { useMediaTracks } from '@/hooks/useMedia'
 import { Label } from '@/components/ui/label'
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '@/components/ui/select'
 import { Input } from '@/components/ui/input'
@@ -17,6 +18,16 @@ export default function UploadMidiaPage() {
   const [tipoInspecao, setTipoInspecao] = useState('ELETROMEC_FINA')
   const [temaPrincipal, setTemaPrincipal] = useState('Inspeção de Ativos')
 
+  // Trilhas simplificadas por asset: o mapa desenha linhas em vez de um ponto por frame.
+  const tracksQuery = useMediaTracks(mediaId ?? undefined, { enabled: Boolean(frames) })
+  const photoPoints = useMemo<FeatureCollection | undefined>(() => {
+    if (!frames) return undefined
+    return {
+      type: 'FeatureCollection',
+      features: frames.features.filter((feature) => feature.properties?.kind !== 'frame'),
+    }
+  }, [frames])
+
   useEffect(() => {
     setLinhaUploadId(linhaSelecionadaId)
   }, [linhaSelecionadaId])
@@ -112,7 +123,8 @@ export default function UploadMidiaPage() {
           <MapLibreUnified
             showInfrastructure
             initialZoom={5}
-            customPoints={frames ?? undefined}
+            customPoints={tracksQuery.data ? photoPoints : frames ?? undefined}
+            customLines={tracksQuery.data as any}
           />
         </div>
         <FramesPreview frames={frames ?? undefined} mediaId={mediaId ?? undefined} />
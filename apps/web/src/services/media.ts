@@ -35,15 +35,28 @@ export interface MediaRecord {
   derived?: {
     frames?: {
       geojson: string;
+      tracks?: string;
       baseDir: string;
     };
   };
   framesResumo?: {
     quantidade: number;
     distancia_m: number;
+    trilhas?: MediaTrackSummary[];
   };
 }
 
+export interface MediaTrackSummary {
+  assetId: string;
+  pontos: number;
+  distancia_m: number;
+  duracao_s?: number | null;
+  velocidadeMedia_mps?: number | null;
+  velocidadeMax_mps?: number | null;
+  ganhoAltitude_m?: number;
+  perdaAltitude_m?: number;
+}
+
 export interface MediaUploadResponse {
   id: string;
   jobId: string;
@@ -112,6 +125,14 @@ export const fetchMediaFrames = async (id: string): Promise<FeatureCollection> =
   return (await response.json()) as FeatureCollection;
 };
 
+export const fetchMediaTracks = async (id: string): Promise<FeatureCollection> => {
+  const response = await fetch(`${baseUrl}/media/${encodeURIComponent(id)}/tracks`);
+  if (!response.ok) {
+    throw new Error("Trilhas indisponíveis");
+  }
+  return (await response.json()) as FeatureCollection;
+};
+
 export const searchMedia = async (params: { tema?: string; periodoInicio?: string; periodoFim?: string; lineId?: string; missionId?: string }) => {
   const search = new URLSearchParams();
   if (params.tema) search.set("tema", params.tema);
@@ -135,3 +156,6 @@ export const getMediaFramesArchiveUrl = (mediaId: string) =>
 
 export const getMediaFramesGeoJsonUrl = (mediaId: string) =>
   `${baseUrl}/media/${encodeURIComponent(mediaId)}/frames`;
+
+export const getMediaTracksGeoJsonUrl = (mediaId: string) =>
+  `${baseUrl}/media/${encodeURIComponent(mediaId)}/tracks`;
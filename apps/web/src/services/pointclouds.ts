@@ -39,7 +39,8 @@ export const uploadPointcloud = async (file: File, lineId?: string) => {
   return (await response.json()) as PointcloudUploadResponse;
 };
 
-export const indexPointcloud = (id: string) => postJSON<{ id: string; status: string }>("/pointclouds/index", { id });
+export const indexPointcloud = (id: string, options: { force?: boolean } = {}) =>
+  postJSON<{ id: string; status: string }>("/pointclouds/index", { id, ...(options.force ? { force: true } : {}) });
 
 export const profilePointcloud = (payload: {
   id: string;
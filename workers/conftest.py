@@ -0,0 +1,38 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, Sequence
+
+import pytest
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def probe_import(worker_dir: Path, lazy_modules: Sequence[str], runs: int = 3) -> Dict[str, object]:
+    """Importa o main.py do worker em interpretadores novos; devolve o menor tempo e os módulos pesados carregados."""
+    results = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", PROBE % (tuple(lazy_modules),)],
+            cwd=worker_dir,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {
+        "elapsed": min(result["elapsed"] for result in results),
+        "loaded": sorted({name for result in results for name in result["loaded"]}),
+    }
+
+
+@pytest.fixture
+def import_probe():
+    return probe_import
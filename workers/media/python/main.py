@@ -14,15 +14,16 @@ import math
 import os
 import re
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import cv2
-import exifread
-import numpy as np
-from pyproj import Geod
-from shapely.geometry import Point, mapping
+# cv2, exifread e pyproj só são importados pelos tipos de asset que os usam,
+# reduzindo o tempo de partida do worker.
+if TYPE_CHECKING:
+    import numpy as np
+    from pyproj import Geod
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 MEDIA_ROOT = os.path.join(ROOT, "apps", "api", ".data", "media")
@@ -39,7 +40,11 @@ OUTBOX = os.path.join(WORKER_ROOT, "outbox")
 for path in (MEDIA_ROOT, MEDIA_RAW, MEDIA_DERIVED, MEDIA_META, FRAMES_BASE, FRAMES_STORE, INBOX, OUTBOX):
     os.makedirs(path, exist_ok=True)
 
-geod = Geod(ellps="WGS84")
+@lru_cache(maxsize=1)
+def get_geod() -> Geod:
+    from pyproj import Geod
+
+    return Geod(ellps="WGS84")
 
 
 def log(message: str) -> None:
@@ -70,6 +75,8 @@ def to_decimal(values, ref) -> Optional[float]:
 
 
 def parse_exif(path: str) -> Dict[str, Any]:
+    import exifread
+
     data: Dict[str, Any] = {}
     try:
         with open(path, "rb") as handle:
@@ -162,6 +169,8 @@ def ensure_dir(path: str) -> str:
 
 
 def save_frame(image: np.ndarray, path: str) -> None:
+    import cv2
+
     ensure_dir(os.path.dirname(path))
     cv2.imwrite(path, image, [int(cv2.IMWRITE_JPEG_QUALITY), 92])
 
@@ -172,6 +181,9 @@ def extract_video_frames(
     interval_seconds: int,
     tracks: List[TrackPoint]
 ) -> List[Dict[str, Any]]:
+    import cv2
+    import numpy as np
+
     capture = cv2.VideoCapture(video_path)
     if not capture.isOpened():
         raise RuntimeError(f"não foi possível abrir vídeo {video_path}")
@@ -212,19 +224,130 @@ def extract_video_frames(
 
 
 def build_feature(lon: float, lat: float, properties: Dict[str, Any]) -> Dict[str, Any]:
-    point = Point(lon, lat)
     return {
         "type": "Feature",
-        "geometry": mapping(point),
+        "geometry": {"type": "Point", "coordinates": (float(lon), float(lat))},
         "properties": properties
     }
 
 
-def accumulate_distance(points: List[Tuple[float, float]]) -> float:
-    if len(points) < 2:
-        return 0.0
-    lons, lats = zip(*points)
-    return float(abs(geod.line_length(lons, lats)))
+# Tolerância da simplificação da trilha, em metros; suficiente para desenhar
+# o trajeto sem carregar todos os frames.
+TRACK_SIMPLIFY_TOLERANCE_M = 1.0
+METERS_PER_DEGREE_LAT = 111_320.0
+
+
+def iso_to_ms(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp() * 1000.0
+    except ValueError:
+        return None
+
+
+@dataclass
+class Trajectory:
+    """Posições de um único asset (ou do conjunto de fotos), na ordem em que chegam."""
+
+    asset_id: str
+    lons: List[float] = field(default_factory=list)
+    lats: List[float] = field(default_factory=list)
+    alts: List[float] = field(default_factory=list)
+    times_ms: List[float] = field(default_factory=list)
+    features: List[Dict[str, Any]] = field(default_factory=list)
+
+    def add(
+        self,
+        lon: float,
+        lat: float,
+        alt: Optional[float],
+        timestamp_ms: Optional[float],
+        feature: Dict[str, Any],
+    ) -> None:
+        self.lons.append(float(lon))
+        self.lats.append(float(lat))
+        self.alts.append(float(alt) if alt is not None else math.nan)
+        self.times_ms.append(float(timestamp_ms) if timestamp_ms is not None else math.nan)
+        self.features.append(feature)
+
+    def sort_by_time(self) -> None:
+        # Ordenação estável; pontos sem horário ficam no fim, na ordem de chegada.
+        order = sorted(range(len(self.times_ms)), key=lambda i: (math.isnan(self.times_ms[i]), self.times_ms[i]))
+        for name in ("lons", "lats", "alts", "times_ms", "features"):
+            values = getattr(self, name)
+            setattr(self, name, [values[i] for i in order])
+
+    def finish(self) -> Dict[str, Any]:
+        """Calcula segmentos, velocidade, rumo e variação de altitude de uma só vez.
+
+        As métricas de cada segmento são gravadas nas propriedades da feature
+        de destino; o retorno é o resumo da trilha.
+        """
+        import numpy as np
+
+        summary: Dict[str, Any] = {"assetId": self.asset_id, "pontos": len(self.lons), "distancia_m": 0.0}
+        if len(self.lons) < 2:
+            return summary
+
+        lons = np.asarray(self.lons)
+        lats = np.asarray(self.lats)
+        alts = np.asarray(self.alts)
+        times_s = np.asarray(self.times_ms) / 1000.0
+
+        azimuths, _, segments = get_geod().inv(lons[:-1], lats[:-1], lons[1:], lats[1:])
+        headings = np.mod(azimuths, 360.0)
+        alt_deltas = np.diff(alts)
+        dt = np.diff(times_s)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            speeds = np.where(dt > 0, segments / dt, np.nan)
+
+        for idx, feature in enumerate(self.features[1:]):
+            props = feature["properties"]
+            props["segment_m"] = round(float(segments[idx]), 3)
+            props["heading_deg"] = round(float(headings[idx]), 2) if segments[idx] > 0 else None
+            props["speed_mps"] = round(float(speeds[idx]), 3) if np.isfinite(speeds[idx]) else None
+            props["alt_delta_m"] = round(float(alt_deltas[idx]), 3) if np.isfinite(alt_deltas[idx]) else None
+
+        timed = np.isfinite(speeds)
+        timed_seconds = float(dt[timed].sum())
+        finite_alt_deltas = alt_deltas[np.isfinite(alt_deltas)]
+        summary.update(
+            {
+                "distancia_m": float(segments.sum()),
+                "duracao_s": float(np.nanmax(times_s) - np.nanmin(times_s)) if np.isfinite(times_s).any() else None,
+                "velocidadeMedia_mps": float(segments[timed].sum() / timed_seconds) if timed_seconds > 0 else None,
+                "velocidadeMax_mps": float(speeds[timed].max()) if timed.any() else None,
+                "ganhoAltitude_m": float(finite_alt_deltas[finite_alt_deltas > 0].sum()),
+                "perdaAltitude_m": float(abs(finite_alt_deltas[finite_alt_deltas < 0].sum())),
+            }
+        )
+        return summary
+
+    def simplified_line(self, properties: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if len(self.lons) < 2:
+            return None
+        import numpy as np
+        from shapely.geometry import LineString
+
+        # Plano métrico local (equiretangular na latitude média da trilha): a
+        # tolerância vale o mesmo em metros nos dois eixos, como no equador.
+        lats = np.asarray(self.lats)
+        lon_scale = math.cos(math.radians(float(lats.mean())))
+        x_scale = lon_scale * METERS_PER_DEGREE_LAT
+        metric = LineString(np.column_stack([np.asarray(self.lons) * x_scale, lats * METERS_PER_DEGREE_LAT]))
+        if metric.length == 0:
+            # Drone parado (todas as posições iguais): não há trilha a desenhar.
+            return None
+        simplified = np.asarray(metric.simplify(TRACK_SIMPLIFY_TOLERANCE_M, preserve_topology=False).coords)
+        coordinates = [
+            [round(float(x / x_scale), 7), round(float(y / METERS_PER_DEGREE_LAT), 7)] for x, y in simplified
+        ]
+        return {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": coordinates},
+            "properties": properties,
+        }
 
 
 def update_record(record_path: str, updater) -> Dict[str, Any]:
@@ -248,10 +371,12 @@ def process_job(job_path: str) -> None:
     frames_dir = ensure_dir(os.path.join(FRAMES_STORE, media_id))
     geojson_dir = ensure_dir(os.path.join(FRAMES_BASE, media_id))
     geojson_path = os.path.join(geojson_dir, "frames.geojson")
+    tracks_path = os.path.join(geojson_dir, "tracks.geojson")
 
     record_path = os.path.join(MEDIA_META, f"{media_id}.json")
     features: List[Dict[str, Any]] = []
-    distance_pairs: List[Tuple[float, float]] = []
+    photo_track = Trajectory(asset_id="fotos")
+    trajectories: List[Trajectory] = []
 
     record = read_json(record_path)
     record["status"] = "processing"
@@ -296,7 +421,13 @@ def process_job(job_path: str) -> None:
                     {**propriedades_base, **{"captured_at": exif_data.get("captured_at"), "kind": "foto"}}
                 )
                 features.append(feature)
-                distance_pairs.append((exif_data["lon"], exif_data["lat"]))
+                photo_track.add(
+                    exif_data["lon"],
+                    exif_data["lat"],
+                    exif_data.get("alt"),
+                    iso_to_ms(exif_data.get("captured_at")),
+                    feature,
+                )
 
         elif asset.get("tipo") == "video":
             base_name = os.path.splitext(asset.get("originalName", ""))[0]
@@ -317,6 +448,8 @@ def process_job(job_path: str) -> None:
                     }
                 )
 
+            trajectory = Trajectory(asset_id=asset_id)
+            trajectories.append(trajectory)
             for frame in video_frames:
                 props = {
                     **propriedades_base,
@@ -327,13 +460,31 @@ def process_job(job_path: str) -> None:
                     "path": os.path.relpath(frame["path"], MEDIA_ROOT)
                 }
                 if frame["lat"] is not None and frame["lon"] is not None:
-                    features.append(build_feature(frame["lon"], frame["lat"], props))
-                    distance_pairs.append((frame["lon"], frame["lat"]))
-
-    distance_total = accumulate_distance(distance_pairs)
+                    feature = build_feature(frame["lon"], frame["lat"], props)
+                    features.append(feature)
+                    trajectory.add(frame["lon"], frame["lat"], frame["alt"], frame["timestamp_ms"], feature)
+
+    # Fotos formam uma única trilha, ordenada pelo horário de captura quando houver.
+    if photo_track.lons:
+        photo_track.sort_by_time()
+        trajectories.insert(0, photo_track)
+
+    track_summaries: List[Dict[str, Any]] = []
+    track_features: List[Dict[str, Any]] = []
+    for trajectory in trajectories:
+        if not trajectory.lons:
+            # Vídeo sem SRT/GPS: sem posições, não entra em trilhas.
+            continue
+        summary = trajectory.finish()
+        track_summaries.append(summary)
+        line_feature = trajectory.simplified_line({"mediaId": media_id, "kind": "track", **summary})
+        if line_feature:
+            track_features.append(line_feature)
+    distance_total = float(sum(summary["distancia_m"] for summary in track_summaries))
 
     fc = {"type": "FeatureCollection", "features": features}
     write_json(geojson_path, fc)
+    write_json(tracks_path, {"type": "FeatureCollection", "features": track_features})
     write_json(os.path.join(OUTBOX, f"{job_id}.geojson"), fc)
 
     def finalize(rec: Dict[str, Any]) -> None:
@@ -347,12 +498,14 @@ def process_job(job_path: str) -> None:
     record["status"] = "done"
     record["framesResumo"] = {
         "quantidade": len(features),
-        "distancia_m": distance_total
+        "distancia_m": distance_total,
+        "trilhas": track_summaries
     }
     record["processadoEm"] = datetime.utcnow().isoformat() + "Z"
     derived = record.get("derived", {})
     derived["frames"] = {
         "geojson": os.path.relpath(geojson_path, MEDIA_ROOT),
+        "tracks": os.path.relpath(tracks_path, MEDIA_ROOT),
         "baseDir": os.path.relpath(os.path.join(FRAMES_STORE, media_id), MEDIA_ROOT)
     }
     record["derived"] = derived
@@ -0,0 +1,17 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+WORKER_MAIN = Path(__file__).resolve().parents[1] / "main.py"
+
+
+@pytest.fixture(scope="session")
+def media_worker():
+    # Carregado com nome próprio: o worker de pointcloud também se chama main.
+    spec = importlib.util.spec_from_file_location("media_worker_main", WORKER_MAIN)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
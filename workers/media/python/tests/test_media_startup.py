@@ -0,0 +1,13 @@
+from pathlib import Path
+
+WORKER_DIR = Path(__file__).resolve().parents[1]
+
+# Medido em ~0,03 s; só numpy já passaria de 0,09 s, cv2 bem mais.
+STARTUP_BUDGET_S = 0.1
+LAZY_MODULES = ("numpy", "laspy", "pyproj", "shapely", "cv2", "tqdm", "exifread")
+
+
+def test_import_stays_within_budget_and_lazy(import_probe):
+    probe = import_probe(WORKER_DIR, LAZY_MODULES)
+    assert probe["loaded"] == []
+    assert probe["elapsed"] < STARTUP_BUDGET_S, f"import levou {probe['elapsed']:.3f}s"
@@ -0,0 +1,159 @@
+import json
+import math
+import os
+
+import numpy as np
+import pytest
+from pyproj import Geod
+
+GEOD = Geod(ellps="WGS84")
+M_PER_DEG = 111_320.0
+
+
+def feature(media_worker, lon, lat, **props):
+    return media_worker.build_feature(lon, lat, dict(props))
+
+
+def make_track(media_worker, points, asset_id="v1"):
+    track = media_worker.Trajectory(asset_id=asset_id)
+    for lon, lat, alt, ts in points:
+        track.add(lon, lat, alt, ts, feature(media_worker, lon, lat, kind="frame"))
+    return track
+
+
+def test_segments_and_headings_match_geod_inv(media_worker):
+    points = [(-46.60, -23.50, 100.0, 0), (-46.59, -23.49, 110.0, 2000), (-46.59, -23.51, 90.0, 5000)]
+    track = make_track(media_worker, points)
+    summary = track.finish()
+
+    total = 0.0
+    for (lon1, lat1, alt1, t1), (lon2, lat2, alt2, t2), feat in zip(points, points[1:], track.features[1:]):
+        az, _, dist = GEOD.inv(lon1, lat1, lon2, lat2)
+        total += dist
+        props = feat["properties"]
+        assert props["segment_m"] == pytest.approx(dist, abs=1e-3)
+        assert props["heading_deg"] == pytest.approx(az % 360.0, abs=1e-2)
+        assert props["speed_mps"] == pytest.approx(dist / ((t2 - t1) / 1000.0), abs=1e-3)
+        assert props["alt_delta_m"] == pytest.approx(alt2 - alt1)
+    assert "segment_m" not in track.features[0]["properties"]
+    assert summary["distancia_m"] == pytest.approx(total)
+    assert summary["duracao_s"] == 5.0
+    assert summary["ganhoAltitude_m"] == 10.0
+    assert summary["perdaAltitude_m"] == 20.0
+
+
+def test_speed_and_heading_undefined_where_they_make_no_sense(media_worker):
+    points = [
+        (-46.600, -23.5, None, 1000),
+        (-46.599, -23.5, None, 1000),  # dt == 0
+        (-46.598, -23.5, None, 500),  # dt < 0
+        (-46.597, -23.5, None, None),  # sem horário
+        (-46.597, -23.5, None, 9000),  # segmento de comprimento zero
+    ]
+    track = make_track(media_worker, points)
+    summary = track.finish()
+    props = [f["properties"] for f in track.features[1:]]
+
+    assert [p["speed_mps"] for p in props] == [None, None, None, None]
+    assert props[3]["heading_deg"] is None
+    assert props[3]["segment_m"] == 0.0
+    assert all(p["heading_deg"] is not None for p in props[:3])
+    assert all(p["alt_delta_m"] is None for p in props)
+    # Nenhum segmento com dt > 0 e horários válidos: não há velocidade a resumir.
+    assert summary["velocidadeMax_mps"] is None
+    assert summary["velocidadeMedia_mps"] is None
+
+
+def test_photos_sorted_by_capture_time_untimed_last(media_worker):
+    track = media_worker.Trajectory(asset_id="fotos")
+    captures = [
+        ("a", "2024-01-01T00:00:10+00:00"),
+        ("b", None),
+        ("c", "2024-01-01T00:00:00+00:00"),
+        ("d", None),
+        ("e", "2024-01-01T00:00:05+00:00"),
+    ]
+    for i, (name, captured) in enumerate(captures):
+        track.add(-46.6 + i * 1e-4, -23.5, None, media_worker.iso_to_ms(captured), feature(media_worker, 0, 0, name=name))
+    track.sort_by_time()
+    assert [f["properties"]["name"] for f in track.features] == ["c", "e", "a", "b", "d"]
+
+
+def test_single_and_stationary_tracks(media_worker):
+    single = make_track(media_worker, [(-46.6, -23.5, 100.0, 0)])
+    assert single.finish() == {"assetId": "v1", "pontos": 1, "distancia_m": 0.0}
+    assert single.simplified_line({}) is None
+
+    stationary = make_track(media_worker, [(-46.6, -23.5, 100.0, i * 1000) for i in range(4)])
+    summary = stationary.finish()
+    assert summary["distancia_m"] == 0.0
+    assert summary["velocidadeMax_mps"] == 0.0
+    assert all(f["properties"]["heading_deg"] is None for f in stationary.features[1:])
+    assert stationary.simplified_line({}) is None
+
+
+# 0,8 m some nos dois eixos; em graus crus (1e-5°) o desvio em longitude a 60° (~0,56 m) ficaria.
+@pytest.mark.parametrize("offset_m, expected_points", [(0.8, 2), (3.0, 5)])
+def test_simplification_tolerance_is_metric_on_both_axes(media_worker, offset_m, expected_points):
+    lat0 = -60.0
+    lon_m = M_PER_DEG * math.cos(math.radians(lat0))
+    # Zigue-zague lateral de offset_m: um voo para leste (desvio em latitude) e
+    # um para norte (desvio em longitude), ambos com 50 m entre pontos.
+    eastward = [(-46.6 + i * 50 / lon_m, lat0 + (offset_m / M_PER_DEG if i % 2 else 0.0), None, None) for i in range(5)]
+    northward = [(-46.6 + (offset_m / lon_m if i % 2 else 0.0), lat0 + i * 50 / M_PER_DEG, None, None) for i in range(5)]
+
+    for points in (eastward, northward):
+        line = make_track(media_worker, points).simplified_line({})
+        assert len(line["geometry"]["coordinates"]) == expected_points
+
+
+def test_two_videos_get_separate_tracks_without_jump(media_worker, tmp_path, monkeypatch):
+    cv2 = pytest.importorskip("cv2")
+    root = tmp_path / "media"
+    dirs = {
+        "MEDIA_ROOT": root,
+        "MEDIA_RAW": root / "raw",
+        "MEDIA_META": root / "meta",
+        "FRAMES_BASE": root / "frames",
+        "FRAMES_STORE": root / "frames" / "store",
+        "OUTBOX": root / "outbox",
+    }
+    for name, path in dirs.items():
+        path.mkdir(parents=True, exist_ok=True)
+        monkeypatch.setattr(media_worker, name, str(path))
+
+    raw_dir = root / "raw" / "m1"
+    raw_dir.mkdir()
+    assets = []
+    # Dois vídeos a ~100 km um do outro, mais um vídeo sem SRT.
+    for name, lon0 in (("v1", -46.6), ("v2", -47.6), ("v3", None)):
+        writer = cv2.VideoWriter(str(raw_dir / f"{name}.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), 10, (32, 24))
+        for i in range(50):
+            writer.write(np.full((24, 32, 3), i, np.uint8))
+        writer.release()
+        if lon0 is not None:
+            blocks = [
+                f"{i + 1}\n00:00:0{i},000 --> 00:00:0{i},999\n-23.5 {lon0 + i * 1e-4} {100 + i}\n"
+                for i in range(5)
+            ]
+            (raw_dir / f"{name}.srt").write_text("\n".join(blocks), encoding="utf-8")
+            assets.append({"id": f"s{name}", "tipo": "srt", "filename": f"{name}.srt", "originalName": f"{name}.srt"})
+        assets.append({"id": name, "tipo": "video", "filename": f"{name}.mp4", "originalName": f"{name}.mp4"})
+
+    media_worker.write_json(str(root / "meta" / "m1.json"), {"assets": assets})
+    job_path = tmp_path / "job.json"
+    job_path.write_text(json.dumps({"id": "j1", "mediaId": "m1", "frameInterval": 1, "assets": assets}), encoding="utf-8")
+    media_worker.process_job(str(job_path))
+
+    record = media_worker.read_json(str(root / "meta" / "m1.json"))
+    trilhas = record["framesResumo"]["trilhas"]
+    assert [t["assetId"] for t in trilhas] == ["v1", "v2"]
+
+    expected = GEOD.line_length([-46.6 + i * 1e-4 for i in range(5)], [-23.5] * 5)
+    for trilha in trilhas:
+        assert trilha["distancia_m"] == pytest.approx(expected, rel=1e-6)
+    assert record["framesResumo"]["distancia_m"] == pytest.approx(2 * expected, rel=1e-6)
+
+    tracks = json.loads((root / "frames" / "m1" / "tracks.geojson").read_text(encoding="utf-8"))
+    assert [f["properties"]["assetId"] for f in tracks["features"]] == ["v1", "v2"]
+    assert record["derived"]["frames"]["tracks"] == os.path.join("frames", "m1", "tracks.geojson")
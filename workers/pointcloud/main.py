@@ -1,21 +1,27 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
+from __future__ import annotations
+
+import hashlib
 import json
 import math
 import os
 import random
+import shutil
 import time
 from collections import Counter, defaultdict
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
-import laspy  # type: ignore
 import numpy as np  # type: ignore
-from pyproj import CRS, Transformer  # type: ignore
-from shapely.geometry import LineString, Point, shape  # type: ignore
-from shapely.ops import transform as shapely_transform  # type: ignore
-from shapely.prepared import prep  # type: ignore
-from tqdm import tqdm  # type: ignore
+
+# laspy, pyproj, shapely e tqdm são importados sob demanda pelos jobs que os
+# usam, para que o worker suba rápido e fique vivo entre jobs com os caches abaixo.
+if TYPE_CHECKING:
+    import laspy  # type: ignore
+    from pyproj import CRS, Transformer  # type: ignore
+    from shapely.geometry import LineString  # type: ignore
 
 ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT / "apps" / "api" / ".data" / "pointclouds"
@@ -47,10 +53,13 @@ def safe_load_json(path: Path) -> Optional[dict]:
         return None
 
 
-def save_json(path: Path, payload: dict) -> None:
+def save_json(path: Path, payload: dict, compact: bool = False) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=False, indent=2)
+        if compact:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+        else:
+            json.dump(payload, handle, ensure_ascii=False, indent=2)
 
 
 def find_las_file(base: Path) -> Optional[Path]:
@@ -61,18 +70,49 @@ def find_las_file(base: Path) -> Optional[Path]:
     return None
 
 
-def prepare_transformers(header: laspy.LasHeader) -> Tuple[Optional[CRS], Optional[Transformer], Optional[Transformer]]:
+def file_key(path: Path) -> Tuple[str, int, int]:
+    stat = path.stat()
+    return str(path.resolve()), stat.st_mtime_ns, stat.st_size
+
+
+@lru_cache(maxsize=32)
+def _cached_header(key: Tuple[str, int, int]) -> laspy.LasHeader:
+    import laspy  # type: ignore
+
+    with laspy.open(key[0]) as reader:
+        return reader.header
+
+
+def load_header(path: Path) -> laspy.LasHeader:
+    """Cabeçalho do arquivo, reaproveitado entre jobs enquanto o arquivo não muda."""
+    return _cached_header(file_key(path))
+
+
+@lru_cache(maxsize=32)
+def _cached_crs(key: Tuple[str, int, int]) -> Optional[CRS]:
     try:
-        crs = header.parse_crs()
+        return _cached_header(key).parse_crs()
     except Exception:
-        crs = None
+        return None
+
+
+@lru_cache(maxsize=16)
+def _cached_transformer_pair(crs_wkt: str) -> Tuple[Transformer, Transformer]:
+    from pyproj import CRS, Transformer  # type: ignore
 
+    crs = CRS.from_wkt(crs_wkt)
+    to_wgs84 = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
+    from_wgs84 = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+    return to_wgs84, from_wgs84
+
+
+def prepare_transformers(path: Path) -> Tuple[Optional[CRS], Optional[Transformer], Optional[Transformer]]:
+    crs = _cached_crs(file_key(path))
     if not crs:
         return None, None, None
 
     try:
-        to_wgs84 = Transformer.from_crs(crs, "EPSG:4326", always_xy=True)
-        from_wgs84 = Transformer.from_crs("EPSG:4326", crs, always_xy=True)
+        to_wgs84, from_wgs84 = _cached_transformer_pair(crs.to_wkt())
         return crs, to_wgs84, from_wgs84
     except Exception as exc:
         log(f"Não foi possível preparar transformações CRS: {exc}")
@@ -97,44 +137,253 @@ def transform_bounds(transformer: Optional[Transformer], mins: Iterable[float],
 
 
 def read_las_chunks(path: Path, chunk_size: int = 1_000_000):
+    import laspy  # type: ignore
+
     with laspy.open(path) as reader:
         for chunk in reader.chunk_iterator(chunk_size):
             yield chunk
 
 
-def process_index_job(base_dir: Path, job: dict) -> None:
-    las_path = Path(job.get("inputFile", ""))
-    if not las_path.exists():
-        raise FileNotFoundError(f"Arquivo LAS/LAZ não encontrado: {las_path}")
+def map_las_records(path: Path, header: laspy.LasHeader) -> Optional[np.memmap]:
+    """Mapeia os registros de pontos de um .las sem compressão como array estruturado.
 
-    with laspy.open(las_path) as reader:
-        header = reader.header
-        mins = list(header.mins)
-        maxs = list(header.maxs)
-        total_points = int(header.point_count)
-        crs, to_wgs84, _ = prepare_transformers(header)
+    Os campos ficam em sua forma bruta (X/Y/Z int32 sem escala), sem cópia.
+    Retorna None quando o arquivo não suporta o caminho rápido (LAZ, arquivo
+    truncado), e o chamador deve recorrer ao laspy. O laspy já ajusta o
+    point_format ao tamanho de registro do arquivo (extra bytes), então o
+    dtype corresponde ao registro gravado.
+    """
+    if path.suffix.lower() != ".las" or header.are_points_compressed:
+        return None
 
-    counter: Counter[int] = Counter()
-    for chunk in read_las_chunks(las_path):
+    dtype = header.point_format.dtype()
+    count = int(header.point_count)
+    if count == 0:
+        return None
+
+    expected_end = int(header.offset_to_point_data) + count * dtype.itemsize
+    if path.stat().st_size < expected_end:
+        log(f"Arquivo {path} menor que o esperado pelo cabeçalho; usando leitura via laspy.")
+        return None
+
+    try:
+        return np.memmap(path, dtype=dtype, mode="r", offset=int(header.offset_to_point_data), shape=(count,))
+    except Exception as exc:
+        log(f"Falha ao mapear {path} em memória: {exc}")
+        return None
+
+
+def record_classes(records: np.ndarray) -> np.ndarray:
+    names = records.dtype.names or ()
+    if "classification" in names:
+        return records["classification"]
+    # Formatos 0-5: classe nos 5 bits inferiores de raw_classification.
+    return records["raw_classification"] & 0x1F
+
+
+def iter_record_chunks(records: np.ndarray, chunk_size: int = 1_000_000):
+    for start in range(0, len(records), chunk_size):
+        yield records[start : start + chunk_size]
+
+
+def bounds_to_int_space(header: laspy.LasHeader, bounds: Tuple[float, float, float, float]) -> Tuple[int, int, int, int]:
+    minx, miny, maxx, maxy = bounds
+    sx, sy = float(header.scales[0]), float(header.scales[1])
+    ox, oy = float(header.offsets[0]), float(header.offsets[1])
+    return (
+        int(math.floor((minx - ox) / sx)),
+        int(math.floor((miny - oy) / sy)),
+        int(math.ceil((maxx - ox) / sx)),
+        int(math.ceil((maxy - oy) / sy)),
+    )
+
+
+def iter_corridor_points(
+    path: Path,
+    header: laspy.LasHeader,
+    bounds: Tuple[float, float, float, float],
+    classes_filter: set,
+    chunk_size: int = 1_000_000,
+):
+    """Gera (xs, ys, zs, classes, intensities) apenas dos pontos dentro de bounds.
+
+    Em .las sem compressão o filtro roda sobre os inteiros brutos do arquivo
+    mapeado e só os sobreviventes são convertidos para float.
+    """
+    classes_array = np.fromiter(classes_filter, dtype=np.int64) if classes_filter else None
+    records = map_las_records(path, header)
+
+    if records is not None:
+        ix_min, iy_min, ix_max, iy_max = bounds_to_int_space(header, bounds)
+        scales = [float(v) for v in header.scales]
+        offsets = [float(v) for v in header.offsets]
+        has_intensity = "intensity" in (records.dtype.names or ())
+        for view in iter_record_chunks(records, chunk_size):
+            raw_x = view["X"]
+            raw_y = view["Y"]
+            mask = (raw_x >= ix_min) & (raw_x <= ix_max) & (raw_y >= iy_min) & (raw_y <= iy_max)
+            classes = record_classes(view)
+            if classes_array is not None:
+                mask &= np.isin(classes, classes_array)
+            if not mask.any():
+                continue
+            yield (
+                raw_x[mask] * scales[0] + offsets[0],
+                raw_y[mask] * scales[1] + offsets[1],
+                view["Z"][mask] * scales[2] + offsets[2],
+                classes[mask].astype(int),
+                view["intensity"][mask] if has_intensity else None,
+            )
+        return
+
+    minx, miny, maxx, maxy = bounds
+    for chunk in read_las_chunks(path, chunk_size):
+        xs = np.asarray(chunk.x)
+        ys = np.asarray(chunk.y)
         classes = np.asarray(chunk.classification, dtype=int)
+        mask = (xs >= minx) & (xs <= maxx) & (ys >= miny) & (ys <= maxy)
+        if classes_array is not None:
+            mask &= np.isin(classes, classes_array)
+        if not mask.any():
+            continue
+        intensities = np.asarray(chunk.intensity) if hasattr(chunk, "intensity") else None
+        yield (
+            xs[mask],
+            ys[mask],
+            np.asarray(chunk.z)[mask],
+            classes[mask],
+            intensities[mask] if intensities is not None else None,
+        )
+
+
+def file_fingerprint(path: Path) -> str:
+    # Tamanho + mtime: uma cópia que preserva o mtime (cp -p, rsync -a) passa
+    # despercebida; nesse caso o index deve ser enfileirado com force.
+    _, mtime_ns, size = file_key(path)
+    return f"{size}-{mtime_ns}"
+
+
+def source_name(base_dir: Path, path: Path) -> str:
+    try:
+        return path.resolve().relative_to(base_dir.resolve()).as_posix()
+    except ValueError:
+        return path.name
+
+
+def resolve_source_files(base_dir: Path, job: dict) -> List[Path]:
+    """raw.las/raw.laz mais as faixas adicionais em sources/, em ordem estável."""
+    sources: List[Path] = []
+    raw = find_las_file(base_dir)
+    if raw:
+        sources.append(raw)
+    sources_dir = base_dir / "sources"
+    if sources_dir.is_dir():
+        sources.extend(
+            sorted(p for p in sources_dir.iterdir() if p.is_file() and p.suffix.lower() in (".las", ".laz"))
+        )
+
+    input_file = job.get("inputFile")
+    if input_file:
+        input_path = Path(input_file)
+        if not input_path.exists():
+            raise FileNotFoundError(f"Arquivo LAS/LAZ não encontrado: {input_path}")
+        if input_path.resolve() not in {p.resolve() for p in sources}:
+            sources.insert(0, input_path)
+
+    if not sources:
+        raise FileNotFoundError(f"Arquivo LAS/LAZ não encontrado: {base_dir}")
+    return sources
+
+
+def ensure_common_crs(sources: List[Path]) -> None:
+    """Recusa fontes com CRS diferente do primeiro arquivo; bbox e perfil são combinados nele."""
+    reference = _cached_crs(file_key(sources[0]))
+    for las_path in sources[1:]:
+        crs = _cached_crs(file_key(las_path))
+        if crs != reference:
+            raise ValueError(
+                f"CRS de {las_path.name} difere de {sources[0].name}; reprojete o arquivo antes de adicioná-lo."
+            )
+
+
+def index_source_file(las_path: Path) -> dict:
+    header = load_header(las_path)
+    mins = list(header.mins)
+    maxs = list(header.maxs)
+    crs, _, _ = prepare_transformers(las_path)
+
+    counter: Counter[int] = Counter()
+    records = map_las_records(las_path, header)
+    if records is not None:
+        class_chunks = (record_classes(view) for view in iter_record_chunks(records))
+    else:
+        class_chunks = (np.asarray(chunk.classification, dtype=int) for chunk in read_las_chunks(las_path))
+    for classes in class_chunks:
         unique, counts = np.unique(classes, return_counts=True)
         for cls, cnt in zip(unique.tolist(), counts.tolist()):
             counter[int(cls)] += int(cnt)
 
-    index_payload = {
-        "id": job["id"],
-        "pointsTotal": total_points,
+    return {
+        "fingerprint": file_fingerprint(las_path),
+        "pointsTotal": int(header.point_count),
         "bbox_native": {
             "min": [float(mins[0]), float(mins[1]), float(mins[2])],
             "max": [float(maxs[0]), float(maxs[1]), float(maxs[2])],
         },
-        "bbox_wgs84": transform_bounds(to_wgs84, mins, maxs),
         "classes": {str(cls): int(count) for cls, count in sorted(counter.items())},
         "coordinate_system": crs.to_wkt() if crs else None,
+        "indexedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def process_index_job(base_dir: Path, job: dict) -> None:
+    sources = resolve_source_files(base_dir, job)
+    ensure_common_crs(sources)
+    prune_orphan_profile_caches(base_dir, sources)
+    index_path = base_dir / "index.json"
+    previous = (safe_load_json(index_path) or {}) if index_path.exists() else {}
+    previous_sources: Dict[str, dict] = previous.get("sources") or {}
+    force = bool(job.get("force"))
+    if force:
+        # O cache de perfil usa o mesmo fingerprint; um reindex forçado também o invalida.
+        shutil.rmtree(base_dir / "products" / "profile_cache", ignore_errors=True)
+
+    source_records: Dict[str, dict] = {}
+    scanned = 0
+    for las_path in sources:
+        name = source_name(base_dir, las_path)
+        cached = previous_sources.get(name)
+        if not force and cached and cached.get("fingerprint") == file_fingerprint(las_path):
+            source_records[name] = cached
+            continue
+        source_records[name] = index_source_file(las_path)
+        scanned += 1
+    log(f"Index: {scanned} arquivo(s) lido(s), {len(sources) - scanned} reaproveitado(s).")
+
+    counter: Counter[int] = Counter()
+    mins = [math.inf, math.inf, math.inf]
+    maxs = [-math.inf, -math.inf, -math.inf]
+    for record in source_records.values():
+        for cls, count in record["classes"].items():
+            counter[int(cls)] += int(count)
+        mins = [min(a, b) for a, b in zip(mins, record["bbox_native"]["min"])]
+        maxs = [max(a, b) for a, b in zip(maxs, record["bbox_native"]["max"])]
+
+    crs, to_wgs84, _ = prepare_transformers(sources[0])
+    crs_wkt = crs.to_wkt() if crs else None
+
+    index_payload = {
+        "id": job["id"],
+        "pointsTotal": sum(int(r["pointsTotal"]) for r in source_records.values()),
+        "bbox_native": {"min": mins, "max": maxs},
+        "bbox_wgs84": transform_bounds(to_wgs84, mins, maxs),
+        "classes": {str(cls): int(count) for cls, count in sorted(counter.items())},
+        "coordinate_system": crs_wkt,
+        "sources": source_records,
         "updatedAt": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
     }
 
-    save_json(base_dir / "index.json", index_payload)
+    save_json(index_path, index_payload)
     save_json(base_dir / "products" / "classes.json", {str(k): v for k, v in CLASS_PALETTE.items()})
 
 
@@ -153,58 +402,47 @@ def interpolate_point(line: LineString, distance: float) -> Tuple[float, float]:
     return float(point.x), float(point.y)
 
 
-def process_profile_job(base_dir: Path, job: dict) -> None:
-    las_path = Path(job.get("inputFile", ""))
-    if not las_path.exists():
-        raise FileNotFoundError(f"Arquivo LAS/LAZ não encontrado: {las_path}")
-
-    line_feature = job.get("line")
-    if not line_feature:
-        raise ValueError("Linha não informada no job.")
-
-    line_geom = shape(line_feature.get("geometry"))
-    if not isinstance(line_geom, LineString):
-        raise ValueError("Geometria da linha deve ser LineString.")
-
-    buffer_m = float(job.get("buffer_m") or 25)
-    step_m = float(job.get("step_m") or 0.5)
-    classes_filter = set(job.get("classes") or [])
-    max_points_plan = int(job.get("max_points_per_plan") or 200_000)
-
-    with laspy.open(las_path) as reader:
-        header = reader.header
-        crs, to_wgs84, from_wgs84 = prepare_transformers(header)
+def line_to_local(line_geom: LineString, from_wgs84: Optional[Transformer]) -> LineString:
+    from shapely.geometry import LineString  # type: ignore
 
     if from_wgs84:
         try:
-            transform_fn = lambda x, y: from_wgs84.transform(x, y)  # noqa: E731
-            transformed_coords = [transform_fn(x, y) for x, y in list(line_geom.coords)]
-            line_local = LineString(transformed_coords)
+            transformed_coords = [from_wgs84.transform(x, y) for x, y in list(line_geom.coords)]
+            return LineString(transformed_coords)
         except Exception as exc:
             log(f"Falha ao reprojetar linha para CRS do LAS: {exc}")
-            line_local = LineString(list(line_geom.coords))
-    else:
-        line_local = LineString(list(line_geom.coords))
-
+    return LineString(list(line_geom.coords))
+
+
+def scan_profile_source(
+    las_path: Path,
+    line_geom: LineString,
+    buffer_m: float,
+    step_m: float,
+    classes_filter: set,
+    max_points_plan: int,
+) -> dict:
+    """Estatísticas de perfil e amostra da planta para um único arquivo de origem."""
+    from shapely.geometry import Point  # type: ignore
+    from shapely.prepared import prep  # type: ignore
+    from tqdm import tqdm  # type: ignore
+
+    header = load_header(las_path)
+    _, to_wgs84, from_wgs84 = prepare_transformers(las_path)
+    line_local = line_to_local(line_geom, from_wgs84)
     if line_local.length == 0:
         raise ValueError("Linha com comprimento zero não é suportada.")
 
-    buffer_geom = prep(line_local.buffer(buffer_m))
+    corridor = line_local.buffer(buffer_m)
+    buffer_geom = prep(corridor)
     total_selected = 0
     plan_features: List[dict] = []
     bins: Dict[int, Dict[int, Dict[str, float]]] = defaultdict(lambda: defaultdict(lambda: {"sum": 0.0, "count": 0}))
 
-    for chunk in tqdm(read_las_chunks(las_path), desc="Filtrando pontos", unit="chunk"):
-        xs = np.asarray(chunk.x)
-        ys = np.asarray(chunk.y)
-        zs = np.asarray(chunk.z)
-        classes = np.asarray(chunk.classification, dtype=int)
-        intensities = np.asarray(chunk.intensity) if hasattr(chunk, "intensity") else None
-
+    corridor_points = iter_corridor_points(las_path, header, corridor.bounds, classes_filter)
+    for xs, ys, zs, classes, intensities in tqdm(corridor_points, desc=f"Filtrando {las_path.name}", unit="chunk"):
         for i in range(len(xs)):
             cls = int(classes[i])
-            if classes_filter and cls not in classes_filter:
-                continue
 
             pt = Point(float(xs[i]), float(ys[i]))
             if not buffer_geom.contains(pt):
@@ -237,9 +475,131 @@ def process_profile_job(base_dir: Path, job: dict) -> None:
             }
             reservoir_add(plan_features, max_points_plan, total_selected - 1, feature)
 
+    return {
+        "fingerprint": file_fingerprint(las_path),
+        "selected": total_selected,
+        "bins": [
+            [bin_index, cls, stats["sum"], stats["count"]]
+            for bin_index, by_cls in sorted(bins.items())
+            for cls, stats in sorted(by_cls.items())
+        ],
+        "sample": plan_features,
+    }
+
+
+def merge_plan_samples(parts: List[dict], capacity: int) -> List[dict]:
+    """Combina as amostras por arquivo mantendo o peso de cada um no total selecionado."""
+    if sum(len(part["sample"]) for part in parts) <= capacity:
+        return [feature for part in parts for feature in part["sample"]]
+
+    total_selected = sum(int(part["selected"]) for part in parts) or 1
+    merged: List[dict] = []
+    for part in parts:
+        quota = min(len(part["sample"]), int(round(capacity * int(part["selected"]) / total_selected)))
+        merged.extend(random.sample(part["sample"], quota))
+    return merged[:capacity]
+
+
+PROFILE_CACHE_ENTRIES_PER_SOURCE = 4
+
+
+def profile_cache_paths(base_dir: Path, name: str, fingerprint: str, params_key: str) -> Tuple[Path, Path]:
+    """Caminhos (bins, amostra da planta) do cache de perfil de uma fonte.
+
+    O nome do arquivo é o hash de fonte + fingerprint + parâmetros, então um
+    cache miss custa só um exists().
+    """
+    digest = hashlib.sha1(f"{name}\0{fingerprint}\0{params_key}".encode("utf-8")).hexdigest()
+    cache_dir = base_dir / "products" / "profile_cache" / name.replace("/", "__")
+    return cache_dir / f"{digest}.bins.json", cache_dir / f"{digest}.plan.json"
+
+
+def prune_orphan_profile_caches(base_dir: Path, sources: List[Path]) -> None:
+    """Remove o cache de perfil de fontes que saíram do diretório (apagadas ou trocadas de extensão)."""
+    cache_root = base_dir / "products" / "profile_cache"
+    if not cache_root.is_dir():
+        return
+    live = {source_name(base_dir, las_path).replace("/", "__") for las_path in sources}
+    for entry in cache_root.iterdir():
+        if entry.is_dir() and entry.name not in live:
+            shutil.rmtree(entry, ignore_errors=True)
+
+
+def prune_profile_cache(cache_dir: Path, keep: int = PROFILE_CACHE_ENTRIES_PER_SOURCE) -> None:
+    entries = sorted(cache_dir.glob("*.bins.json"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for stale in entries[keep:]:
+        stale.unlink(missing_ok=True)
+        stale.with_name(stale.name.replace(".bins.json", ".plan.json")).unlink(missing_ok=True)
+
+
+def process_profile_job(base_dir: Path, job: dict) -> None:
+    from shapely.geometry import LineString, shape  # type: ignore
+
+    sources = resolve_source_files(base_dir, job)
+    ensure_common_crs(sources)
+    prune_orphan_profile_caches(base_dir, sources)
+
+    line_feature = job.get("line")
+    if not line_feature:
+        raise ValueError("Linha não informada no job.")
+
+    line_geom = shape(line_feature.get("geometry"))
+    if not isinstance(line_geom, LineString):
+        raise ValueError("Geometria da linha deve ser LineString.")
+
+    buffer_m = float(job.get("buffer_m") or 25)
+    step_m = float(job.get("step_m") or 0.5)
+    classes_filter = set(job.get("classes") or [])
+    max_points_plan = int(job.get("max_points_per_plan") or 200_000)
+
+    # Estatísticas por arquivo só valem para os mesmos parâmetros de perfil.
+    params_key = json.dumps(
+        {
+            "line": [list(coord) for coord in line_geom.coords],
+            "buffer_m": buffer_m,
+            "step_m": step_m,
+            "classes": sorted(classes_filter),
+            "max_points_per_plan": max_points_plan,
+        },
+        sort_keys=True,
+    )
+
+    _, to_wgs84, from_wgs84 = prepare_transformers(sources[0])
+    line_local = line_to_local(line_geom, from_wgs84)
+    if line_local.length == 0:
+        raise ValueError("Linha com comprimento zero não é suportada.")
+
+    parts: List[dict] = []
+    scanned = 0
+    for las_path in sources:
+        bins_path, plan_path = profile_cache_paths(
+            base_dir, source_name(base_dir, las_path), file_fingerprint(las_path), params_key
+        )
+        if bins_path.exists() and plan_path.exists():
+            cached_bins = safe_load_json(bins_path)
+            cached_plan = safe_load_json(plan_path)
+            if cached_bins and cached_plan:
+                bins_path.touch()
+                parts.append({**cached_bins, "sample": cached_plan["features"]})
+                continue
+        part = scan_profile_source(las_path, line_geom, buffer_m, step_m, classes_filter, max_points_plan)
+        save_json(plan_path, {"features": part["sample"]}, compact=True)
+        save_json(bins_path, {key: value for key, value in part.items() if key != "sample"}, compact=True)
+        prune_profile_cache(bins_path.parent)
+        parts.append(part)
+        scanned += 1
+    log(f"Perfil: {scanned} arquivo(s) lido(s), {len(sources) - scanned} reaproveitado(s) do cache.")
+
+    bins: Dict[int, Dict[int, Dict[str, float]]] = defaultdict(lambda: defaultdict(lambda: {"sum": 0.0, "count": 0}))
+    for part in parts:
+        for bin_index, cls, z_sum, count in part["bins"]:
+            stats = bins[int(bin_index)][int(cls)]
+            stats["sum"] += float(z_sum)
+            stats["count"] += int(count)
+
     plan_collection = {
         "type": "FeatureCollection",
-        "features": plan_features,
+        "features": merge_plan_samples(parts, max_points_plan),
     }
 
     series: List[dict] = []
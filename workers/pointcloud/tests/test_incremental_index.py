@@ -0,0 +1,167 @@
+import json
+import os
+
+import laspy
+import numpy as np
+import pyproj
+import pytest
+
+import main as worker
+
+ORIGIN = (330000.0, 7390000.0)
+
+
+def write_strip(path, seed, n=4000, classification=None, epsg=31983):
+    header = laspy.LasHeader(point_format=6, version="1.4")
+    header.scales = [0.01] * 3
+    header.offsets = [ORIGIN[0], ORIGIN[1], 0.0]
+    header.add_crs(pyproj.CRS.from_epsg(epsg))
+    las = laspy.LasData(header)
+    rng = np.random.default_rng(seed)
+    las.x = ORIGIN[0] + rng.uniform(0, 200, n)
+    las.y = ORIGIN[1] + rng.uniform(0, 200, n)
+    las.z = rng.uniform(0, 40, n)
+    las.classification = np.full(n, classification) if classification else rng.choice([1, 2, 5], n)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    las.write(path)
+
+
+def bump_mtime(path):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def profile_job(base):
+    to_wgs84 = pyproj.Transformer.from_crs(31983, 4326, always_xy=True)
+    coords = [list(to_wgs84.transform(ORIGIN[0] + 20, ORIGIN[1] + 20)), list(to_wgs84.transform(ORIGIN[0] + 180, ORIGIN[1] + 180))]
+    return {
+        "id": "pc",
+        "inputFile": str(base / "raw.las"),
+        "line": {"type": "Feature", "geometry": {"type": "LineString", "coordinates": coords}},
+        "buffer_m": 10,
+        "step_m": 5,
+        "max_points_per_plan": 500,
+    }
+
+
+@pytest.fixture
+def base(tmp_path):
+    write_strip(tmp_path / "raw.las", seed=1)
+    write_strip(tmp_path / "sources" / "strip2.las", seed=2)
+    return tmp_path
+
+
+def read_index(base):
+    return json.loads((base / "index.json").read_text(encoding="utf-8"))
+
+
+def test_index_rescans_only_changed_sources(base, monkeypatch):
+    job = {"id": "pc", "inputFile": str(base / "raw.las")}
+    worker.process_index_job(base, job)
+    first = read_index(base)
+    assert first["pointsTotal"] == 8000
+    assert set(first["sources"]) == {"raw.las", "sources/strip2.las"}
+
+    scanned = []
+    original = worker.index_source_file
+    monkeypatch.setattr(worker, "index_source_file", lambda path: scanned.append(path.name) or original(path))
+
+    worker.process_index_job(base, job)
+    assert scanned == []
+
+    write_strip(base / "sources" / "strip2.las", seed=2, classification=3)
+    bump_mtime(base / "sources" / "strip2.las")
+    worker.process_index_job(base, job)
+    assert scanned == ["strip2.las"]
+    merged = read_index(base)
+    assert merged["classes"]["3"] == 4000
+    assert sum(merged["classes"].values()) == merged["pointsTotal"] == 8000
+
+
+def test_profile_merges_sources_and_reuses_cache(base, monkeypatch):
+    job = profile_job(base)
+    worker.process_profile_job(base, job)
+    series = json.loads((base / "products" / "profile.json").read_text(encoding="utf-8"))["series"]
+
+    monkeypatch.setattr(worker, "scan_profile_source", lambda *args: pytest.fail("cache não reaproveitado"))
+    worker.process_profile_job(base, job)
+    cached_series = json.loads((base / "products" / "profile.json").read_text(encoding="utf-8"))["series"]
+    assert cached_series == series
+
+    combined = laspy.read(base / "raw.las")
+    strip = laspy.read(base / "sources" / "strip2.las")
+    single = base / "single"
+    merged = laspy.LasData(combined.header)
+    merged.points = laspy.ScaleAwarePointRecord(
+        np.concatenate([combined.points.array, strip.points.array]),
+        combined.header.point_format,
+        combined.header.scales,
+        combined.header.offsets,
+    )
+    single.mkdir()
+    merged.write(single / "raw.las")
+    monkeypatch.undo()
+    worker.process_profile_job(single, dict(job, inputFile=str(single / "raw.las")))
+    expected = json.loads((single / "products" / "profile.json").read_text(encoding="utf-8"))["series"]
+    assert [(r["s_m"], r["cls"], r["count"]) for r in series] == [(r["s_m"], r["cls"], r["count"]) for r in expected]
+    assert [r["z_m"] for r in series] == pytest.approx([r["z_m"] for r in expected], abs=1e-3)
+
+
+def test_profile_cache_miss_does_not_read_other_entries(base, monkeypatch):
+    worker.process_profile_job(base, profile_job(base))
+
+    loaded = []
+    original = worker.safe_load_json
+    monkeypatch.setattr(worker, "safe_load_json", lambda path: loaded.append(path) or original(path))
+    worker.process_profile_job(base, dict(profile_job(base), buffer_m=12))
+    assert not any("profile_cache" in str(path) for path in loaded)
+
+
+def test_rejects_source_with_different_crs(base):
+    write_strip(base / "sources" / "strip3.las", seed=3, epsg=31982)
+    with pytest.raises(ValueError, match="CRS"):
+        worker.process_index_job(base, {"id": "pc", "inputFile": str(base / "raw.las")})
+    with pytest.raises(ValueError, match="CRS"):
+        worker.process_profile_job(base, profile_job(base))
+
+
+def test_missing_input_file_still_fails(base):
+    with pytest.raises(FileNotFoundError):
+        worker.process_index_job(base, {"id": "pc", "inputFile": str(base / "gone.las")})
+
+
+def test_profile_cache_of_removed_source_is_pruned(base):
+    worker.process_profile_job(base, profile_job(base))
+    cache_root = base / "products" / "profile_cache"
+    assert (cache_root / "sources__strip2.las").is_dir()
+
+    # Troca de extensão, como o POST /:id/sources faz com strip2.las -> strip2.laz.
+    (base / "sources" / "strip2.las").rename(base / "sources" / "strip2.laz")
+    worker.process_profile_job(base, profile_job(base))
+    assert not (cache_root / "sources__strip2.las").exists()
+    assert (cache_root / "sources__strip2.laz").is_dir()
+
+    (base / "sources" / "strip2.laz").unlink()
+    worker.process_index_job(base, {"id": "pc", "inputFile": str(base / "raw.las")})
+    assert sorted(p.name for p in cache_root.iterdir()) == ["raw.las"]
+
+
+def test_force_rescans_file_copied_with_preserved_mtime(base):
+    job = {"id": "pc", "inputFile": str(base / "raw.las")}
+    worker.process_index_job(base, job)
+    worker.process_profile_job(base, profile_job(base))
+
+    # Reclassificação in-place copiada com cp -p: mesmo tamanho e mesmo mtime.
+    strip = base / "sources" / "strip2.las"
+    stat = strip.stat()
+    write_strip(strip, seed=2, classification=3)
+    os.utime(strip, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    worker._cached_header.cache_clear()
+    worker._cached_crs.cache_clear()
+
+    worker.process_index_job(base, job)
+    assert "3" not in read_index(base)["classes"]
+
+    worker.process_index_job(base, dict(job, force=True))
+    assert read_index(base)["classes"]["3"] == 4000
+    assert not (base / "products" / "profile_cache").exists()
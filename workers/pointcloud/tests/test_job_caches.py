@@ -0,0 +1,47 @@
+import laspy
+import numpy as np
+import pyproj
+
+import main as worker
+
+
+def write_las(path, n=500):
+    header = laspy.LasHeader(point_format=6, version="1.4")
+    header.scales = [0.01] * 3
+    header.offsets = [330000.0, 7390000.0, 0.0]
+    header.add_crs(pyproj.CRS.from_epsg(31983))
+    las = laspy.LasData(header)
+    rng = np.random.default_rng(0)
+    las.x = 330000.0 + rng.uniform(0, 50, n)
+    las.y = 7390000.0 + rng.uniform(0, 50, n)
+    las.z = rng.uniform(0, 10, n)
+    las.classification = rng.choice([1, 2], n)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    las.write(path)
+
+
+def test_transformers_and_headers_reused_across_jobs(tmp_path, monkeypatch):
+    for cache in (worker._cached_header, worker._cached_crs, worker._cached_transformer_pair):
+        cache.cache_clear()
+
+    calls = []
+    original = pyproj.Transformer.from_crs
+    monkeypatch.setattr(
+        pyproj.Transformer, "from_crs", staticmethod(lambda *args, **kwargs: calls.append(args) or original(*args, **kwargs))
+    )
+
+    first, second = tmp_path / "a", tmp_path / "b"
+    write_las(first / "raw.las")
+    write_las(second / "raw.las")
+
+    worker.process_index_job(first, {"id": "a", "inputFile": str(first / "raw.las")})
+    created = len(calls)
+    hits = worker._cached_transformer_pair.cache_info().hits
+    assert created == 2
+
+    # Mesmo arquivo de novo e outro arquivo no mesmo CRS: nenhuma transformação nova.
+    worker.process_index_job(first, {"id": "a", "inputFile": str(first / "raw.las")})
+    worker.process_index_job(second, {"id": "b", "inputFile": str(second / "raw.las")})
+    assert len(calls) == created
+    assert worker._cached_transformer_pair.cache_info().hits > hits
+    assert worker._cached_header.cache_info().hits > 0
@@ -0,0 +1,105 @@
+import shutil
+from pathlib import Path
+
+import laspy
+import numpy as np
+import pytest
+
+import main as worker
+
+SCALE = 0.01
+OFFSETS = (330000.0, 7390000.0, 0.0)
+
+
+def write_las(path: Path, point_format: int, n: int = 5000) -> laspy.LasData:
+    header = laspy.LasHeader(point_format=point_format, version="1.4" if point_format >= 6 else "1.2")
+    header.scales = [SCALE] * 3
+    header.offsets = list(OFFSETS)
+    las = laspy.LasData(header)
+    rng = np.random.default_rng(point_format)
+    las.x = OFFSETS[0] + rng.uniform(0, 100, n)
+    las.y = OFFSETS[1] + rng.uniform(0, 100, n)
+    las.z = rng.uniform(0, 40, n)
+    # Classes > 31 só existem nos formatos 6+; nos 0-5 mistura bits de flag no mesmo byte.
+    las.classification = rng.choice([1, 2, 5, 6, 18] if point_format >= 6 else [1, 2, 5, 6, 17], n)
+    if point_format < 6:
+        las.synthetic = rng.integers(0, 2, n).astype(bool)
+        las.withheld = rng.integers(0, 2, n).astype(bool)
+    las.intensity = rng.integers(0, 1000, n)
+    las.write(path)
+    return laspy.read(path)
+
+
+def collect(path: Path, bounds, classes_filter=frozenset()):
+    header = worker.load_header(path)
+    parts = list(worker.iter_corridor_points(path, header, bounds, set(classes_filter), chunk_size=1000))
+    if not parts:
+        return np.empty((0, 5))
+    return np.concatenate([np.column_stack([xs, ys, zs, cls, inten]) for xs, ys, zs, cls, inten in parts])
+
+
+def reference(las: laspy.LasData, bounds, classes_filter=frozenset(), slack: float = 0.0):
+    minx, miny, maxx, maxy = bounds
+    xs, ys = np.asarray(las.x), np.asarray(las.y)
+    classes = np.asarray(las.classification, dtype=int)
+    mask = (xs >= minx - slack) & (xs <= maxx + slack) & (ys >= miny - slack) & (ys <= maxy + slack)
+    if classes_filter:
+        mask &= np.isin(classes, list(classes_filter))
+    return np.column_stack([xs, ys, np.asarray(las.z), classes, np.asarray(las.intensity)])[mask]
+
+
+def sorted_rows(rows: np.ndarray) -> np.ndarray:
+    return rows[np.lexsort(rows.T[::-1])]
+
+
+@pytest.mark.parametrize("point_format", [1, 3, 6, 7])
+def test_index_classes_match_laspy(tmp_path, point_format):
+    las = write_las(tmp_path / "raw.las", point_format)
+    header = worker.load_header(tmp_path / "raw.las")
+    records = worker.map_las_records(tmp_path / "raw.las", header)
+    assert records is not None
+    np.testing.assert_array_equal(worker.record_classes(records), np.asarray(las.classification))
+
+
+@pytest.mark.parametrize("point_format", [1, 3, 6, 7])
+def test_corridor_points_match_laspy(tmp_path, point_format):
+    las = write_las(tmp_path / "raw.las", point_format)
+    # Limites fora da grade de inteiros: exigem floor/ceil na conversão.
+    bounds = (OFFSETS[0] + 20.0037, OFFSETS[1] + 30.0051, OFFSETS[0] + 70.0049, OFFSETS[1] + 80.0013)
+    classes_filter = {2, 6}
+
+    got = sorted_rows(collect(tmp_path / "raw.las", bounds, classes_filter))
+    exact = sorted_rows(reference(las, bounds, classes_filter))
+    widened = sorted_rows(reference(las, bounds, classes_filter, slack=SCALE))
+
+    # O filtro inteiro é conservador: inclui todo ponto dentro dos limites e no
+    # máximo um passo de escala além deles; o buffer exato corta o resto depois.
+    exact_set = {tuple(row) for row in exact}
+    got_set = {tuple(row) for row in got}
+    assert exact_set <= got_set
+    assert got_set <= {tuple(row) for row in widened}
+    assert len(exact) > 0
+
+
+def test_int_bounds_round_outwards():
+    header = laspy.LasHeader(point_format=3)
+    header.scales = [SCALE] * 3
+    header.offsets = list(OFFSETS)
+    bounds = (OFFSETS[0] + 1.0037, OFFSETS[1] + 2.0051, OFFSETS[0] + 3.0049, OFFSETS[1] + 4.0013)
+    assert worker.bounds_to_int_space(header, bounds) == (100, 200, 301, 401)
+
+
+@pytest.mark.parametrize("point_format", [3, 6])
+def test_laspy_fallback_matches_fast_path(tmp_path, point_format):
+    las = write_las(tmp_path / "raw.las", point_format)
+    # Mesmo conteúdo com extensão .laz força o caminho via chunk_iterator do laspy.
+    fallback_path = tmp_path / "copy.laz"
+    shutil.copy(tmp_path / "raw.las", fallback_path)
+    assert worker.map_las_records(fallback_path, worker.load_header(fallback_path)) is None
+
+    bounds = (OFFSETS[0] + 10.0, OFFSETS[1] + 10.0, OFFSETS[0] + 60.0, OFFSETS[1] + 60.0)
+    fallback = sorted_rows(collect(fallback_path, bounds, {2}))
+    np.testing.assert_allclose(fallback, sorted_rows(reference(las, bounds, {2})))
+
+    fast = {tuple(row) for row in collect(tmp_path / "raw.las", bounds, {2})}
+    assert {tuple(row) for row in fallback} <= fast
@@ -0,0 +1,13 @@
+from pathlib import Path
+
+WORKER_DIR = Path(__file__).resolve().parents[1]
+
+# Medido em ~0,11 s, quase todo o numpy; laspy/pyproj/shapely somariam ~0,3 s.
+STARTUP_BUDGET_S = 0.3
+LAZY_MODULES = ("laspy", "pyproj", "shapely", "cv2", "tqdm")
+
+
+def test_import_stays_within_budget_and_lazy(import_probe):
+    probe = import_probe(WORKER_DIR, LAZY_MODULES)
+    assert probe["loaded"] == []
+    assert probe["elapsed"] < STARTUP_BUDGET_S, f"import levou {probe['elapsed']:.3f}s"